@@ -0,0 +1,61 @@
+#!/bin/sh
+#
+# pane-title-client: Ask the peacock daemon for a colored pane title
+#
+# Usage: pane-title-client.sh <directory> [pane_id]
+#
+# Starts peacock-daemon.py in the background if it is not running yet and
+# falls back to pane-title-colored.py whenever the daemon can't answer.
+#
+
+SCRIPTS_DIR="$( cd "$( dirname "$0" )" && pwd )"
+
+fallback() {
+    exec "$SCRIPTS_DIR/pane-title-colored.py" "$@"
+}
+
+# A directory (not a symlink) owned by us, as checked by get_runtime_dir()
+private_dir() {
+    [ -d "$1" ] && [ ! -L "$1" ] && [ -O "$1" ]
+}
+
+# Same lookup as get_runtime_dir() in peacock_utils.py
+if [ -n "$XDG_RUNTIME_DIR" ] && [ -d "$XDG_RUNTIME_DIR" ]; then
+    RUNTIME_DIR="$XDG_RUNTIME_DIR"
+else
+    RUNTIME_DIR="/tmp/tmux-peacock-$(id -u)"
+    [ -e "$RUNTIME_DIR" ] || mkdir -m 700 "$RUNTIME_DIR" 2>/dev/null
+    if ! private_dir "$RUNTIME_DIR"; then
+        # Someone else owns the /tmp path, never talk to a socket in it
+        RUNTIME_DIR="$HOME/.cache/tmux-peacock"
+        [ -e "$RUNTIME_DIR" ] || mkdir -p -m 700 "$RUNTIME_DIR" 2>/dev/null
+        private_dir "$RUNTIME_DIR" || fallback "$@"
+    fi
+fi
+SOCK="$RUNTIME_DIR/tmux-peacock.sock"
+
+# The daemon exits immediately if another instance already holds its lock
+spawn_daemon() {
+    if command -v setsid >/dev/null 2>&1; then
+        setsid nohup "$SCRIPTS_DIR/peacock-daemon.py" "$SOCK" >/dev/null 2>&1 &
+    else
+        nohup "$SCRIPTS_DIR/peacock-daemon.py" "$SOCK" >/dev/null 2>&1 &
+    fi
+}
+
+if ! command -v socat >/dev/null 2>&1; then
+    fallback "$@"
+fi
+
+if [ ! -S "$SOCK" ]; then
+    spawn_daemon
+    fallback "$@"
+fi
+
+title=$(printf 'COLORED_TITLE %s\n' "$1" | socat - "UNIX-CONNECT:$SOCK" 2>/dev/null)
+if [ -z "$title" ]; then
+    # Stale socket from a daemon that died
+    spawn_daemon
+    fallback "$@"
+fi
+printf '%s\n' "$title"
@@ -5,43 +5,39 @@ tmux-pane-title-colored: Generate colored title for a specific pane based on its
 
 import os
 import sys
-from pathlib import Path
 
 from peacock_utils import (
-    get_git_toplevel,
-    get_git_branch,
-    get_worktree_info,
+    build_pane_title,
+    get_git_info,
     get_peacock_color,
-    normalize_path,
+    TitleCache,
+    validate_directory,
 )
 
 
 def main():
     directory = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
 
-    if not os.path.isdir(directory):
+    if not validate_directory(directory):
         directory = os.getcwd()
 
-    git_root = get_git_toplevel(directory)
-    color = get_peacock_color(directory)
-
-    if git_root:
-        worktree_name, subdir = get_worktree_info(directory, git_root)
-        branch = get_git_branch(directory)
-
-        title = worktree_name or Path(git_root).name
-        if branch:
-            title += f"@{branch}"
-        if subdir:
-            title += f":{subdir}"
-    else:
-        normalized_path = normalize_path(directory)
-        if normalized_path == "~":
-            title = "~"
-        else:
-            title = Path(normalized_path).name or normalized_path
-
-    print(f"#[fg={color}]{title}#[default]")
+    # #() jobs in pane-border-format don't inherit $TMUX_PANE, so the
+    # pane id is passed as the second argument
+    pane_id = sys.argv[2] if len(sys.argv) > 2 else os.environ.get("TMUX_PANE")
+    title_cache = TitleCache(pane_id, "colored")
+    cached_title = title_cache.get(directory)
+    if cached_title is not None:
+        print(cached_title)
+        return
+
+    git_info = get_git_info(directory)
+    git_root = git_info["toplevel"] if git_info else None
+    color = get_peacock_color(directory, git_root=git_root)
+    title = build_pane_title(directory, git_info)
+
+    colored_title = f"#[fg={color}]{title}#[default]"
+    title_cache.set(directory, colored_title)
+    print(colored_title)
 
 
 if __name__ == "__main__":
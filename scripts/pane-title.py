@@ -5,40 +5,34 @@ tmux-pane-title: Generate title for a specific pane based on its directory
 
 import os
 import sys
-from pathlib import Path
 
 from peacock_utils import (
-    get_git_toplevel,
-    get_git_branch,
-    get_worktree_info,
-    normalize_path,
+    build_pane_title,
+    get_git_info,
+    TitleCache,
+    validate_directory,
 )
 
 
 def main():
     directory = sys.argv[1] if len(sys.argv) > 1 else os.getcwd()
 
-    if not os.path.isdir(directory):
+    if not validate_directory(directory):
         directory = os.getcwd()
 
-    git_root = get_git_toplevel(directory)
-
-    if git_root:
-        worktree_name, subdir = get_worktree_info(directory, git_root)
-        branch = get_git_branch(directory)
-
-        title = worktree_name or Path(git_root).name
-        if branch:
-            title += f"@{branch}"
-        if subdir:
-            title += f":{subdir}"
-        print(title)
-    else:
-        normalized_path = normalize_path(directory)
-        if normalized_path == "~":
-            print("~")
-        else:
-            print(Path(normalized_path).name or normalized_path)
+    # #() jobs in pane-border-format don't inherit $TMUX_PANE, so the
+    # pane id is passed as the second argument
+    pane_id = sys.argv[2] if len(sys.argv) > 2 else os.environ.get("TMUX_PANE")
+    title_cache = TitleCache(pane_id, "plain")
+    cached_title = title_cache.get(directory)
+    if cached_title is not None:
+        print(cached_title)
+        return
+
+    title = build_pane_title(directory, get_git_info(directory))
+
+    title_cache.set(directory, title)
+    print(title)
 
 
 if __name__ == "__main__":
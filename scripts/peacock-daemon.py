@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+tmux-peacock-daemon: Serve pane titles and colors over a unix socket
+
+Keeps a single Python process (and its caches) alive so pane title
+renders don't pay interpreter startup and module imports on every call.
+
+Protocol (one request per connection, newline terminated):
+    TITLE <dir>          -> pane title
+    COLOR <dir>          -> peacock hex color
+    COLORED_TITLE <dir>  -> pane title wrapped in tmux color markup
+"""
+
+import os
+import signal
+import socketserver
+import sys
+from pathlib import Path
+
+from peacock_utils import (
+    FileLock,
+    build_pane_title,
+    ensure_private_dir,
+    flush_color_cache,
+    get_daemon_socket_path,
+    get_git_info,
+    get_peacock_color,
+    validate_directory,
+)
+
+IDLE_TIMEOUT = 600  # seconds without requests before the daemon exits
+MAX_REQUEST_SIZE = 8192
+
+
+def handle_command(line):
+    # Directories come and go between requests
+    validate_directory.cache_clear()
+
+    command, _, directory = line.partition(" ")
+    # Relative paths would resolve against the daemon's cwd ("/"), an empty
+    # reply makes the client fall back instead
+    if not os.path.isabs(directory) or not validate_directory(directory):
+        return ""
+
+    git_info = get_git_info(directory)
+    git_root = git_info["toplevel"] if git_info else None
+
+    if command == "TITLE":
+        return build_pane_title(directory, git_info)
+    if command == "COLOR":
+        return get_peacock_color(directory, git_root=git_root)
+    if command == "COLORED_TITLE":
+        title = build_pane_title(directory, git_info)
+        color = get_peacock_color(directory, git_root=git_root)
+        return f"#[fg={color}]{title}#[default]"
+    return ""
+
+
+class PeacockRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline(MAX_REQUEST_SIZE).decode("utf-8", "replace")
+        try:
+            response = handle_command(line.rstrip("\n"))
+        except Exception:
+            response = ""
+        self.wfile.write(f"{response}\n".encode("utf-8"))
+        # Persist new colors once the reply is out, the daemon may be killed
+        # before it gets to exit normally
+        self.wfile.flush()
+        flush_color_cache()
+
+
+class PeacockServer(socketserver.UnixStreamServer):
+    timeout = IDLE_TIMEOUT
+    idle = False
+
+    def handle_timeout(self):
+        self.idle = True
+
+
+def main():
+    socket_path = Path(sys.argv[1]) if len(sys.argv) > 1 else get_daemon_socket_path()
+
+    # The socket and its lock live next to each other, in a directory only
+    # we can get at
+    if not ensure_private_dir(socket_path.parent):
+        sys.exit(f"peacock-daemon: {socket_path.parent} is not a private directory")
+
+    # Only one daemon per socket
+    lock = FileLock(f"{socket_path}.lock")
+    if not lock.acquire():
+        sys.exit(0)
+
+    # Don't keep the launching pane's directory busy
+    os.chdir("/")
+    # Exit through the finally block below so the socket gets removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    try:
+        # Remove a stale socket left behind by a previous daemon
+        try:
+            if socket_path.is_socket():
+                socket_path.unlink()
+        except OSError:
+            pass
+
+        old_umask = os.umask(0o077)
+        try:
+            server = PeacockServer(str(socket_path), PeacockRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+        with server:
+            while not server.idle:
+                server.handle_request()
+    finally:
+        try:
+            socket_path.unlink()
+        except OSError:
+            pass
+        lock.release()
+
+
+if __name__ == "__main__":
+    main()
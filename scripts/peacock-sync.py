@@ -10,73 +10,75 @@ from pathlib import Path
 
 from peacock_utils import (
     FileLock,
-    get_peacock_color,
-    mute_color,
-    create_background_tint,
+    get_git_info,
+    get_peacock_palette,
     SUBPROCESS_TIMEOUT,
+    validate_directory,
 )
 
+# Window user option recording the palette last applied to the window
+LAST_COLOR_OPTION = "@peacock_last_color"
 
-def set_tmux_pane_colors(color):
-    if color:
-        muted = mute_color(color, 0.6)
-        bright = mute_color(color, 0.8)
-        bg_tint = create_background_tint(color, 0.08)
-
-        if not muted or not bright or not bg_tint:
-            return
-
-        try:
-            subprocess.run(
-                [
-                    "tmux",
-                    "set-option",
-                    "pane-border-style",
-                    f"fg={muted}",
-                    ";",
-                    "set-option",
-                    "pane-active-border-style",
-                    f"fg={bright}",
-                    ";",
-                    "set-option",
-                    "window-style",
-                    f"bg={bg_tint}",
-                    ";",
-                    "set-option",
-                    "window-active-style",
-                    "bg=default",
-                ],
-                capture_output=True,
-                timeout=SUBPROCESS_TIMEOUT,
-            )
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-            pass
+
+def palette_fingerprint(palette):
+    return palette["base"] if palette else "default"
+
+
+def get_last_applied_fingerprint():
+    try:
+        result = subprocess.run(
+            ["tmux", "show-option", "-wqv", LAST_COLOR_OPTION],
+            capture_output=True,
+            text=True,
+            timeout=SUBPROCESS_TIMEOUT,
+        )
+        if result.returncode == 0:
+            return result.stdout.strip() or None
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError):
+        pass
+    return None
+
+
+def set_tmux_pane_colors(palette):
+    if palette:
+        border_fg = palette["muted"]
+        active_border_fg = palette["bright"]
+        window_bg = palette["tint"]
     else:
-        try:
-            subprocess.run(
-                [
-                    "tmux",
-                    "set-option",
-                    "pane-border-style",
-                    "fg=colour240",
-                    ";",
-                    "set-option",
-                    "pane-active-border-style",
-                    "fg=colour250",
-                    ";",
-                    "set-option",
-                    "window-style",
-                    "bg=default",
-                    ";",
-                    "set-option",
-                    "window-active-style",
-                    "bg=default",
-                ],
-                capture_output=True,
-                timeout=SUBPROCESS_TIMEOUT,
-            )
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError):
-            pass
+        border_fg, active_border_fg, window_bg = "colour240", "colour250", "default"
+
+    # Chain all set-option commands with tmux's ";" separator so the whole
+    # update costs a single fork/exec and one round-trip to the tmux server.
+    try:
+        subprocess.run(
+            [
+                "tmux",
+                "set-option",
+                "pane-border-style",
+                f"fg={border_fg}",
+                ";",
+                "set-option",
+                "pane-active-border-style",
+                f"fg={active_border_fg}",
+                ";",
+                "set-option",
+                "window-style",
+                f"bg={window_bg}",
+                ";",
+                "set-option",
+                "window-active-style",
+                "bg=default",
+                ";",
+                "set-option",
+                "-w",
+                LAST_COLOR_OPTION,
+                palette_fingerprint(palette),
+            ],
+            capture_output=True,
+            timeout=SUBPROCESS_TIMEOUT,
+        )
+    except (subprocess.TimeoutExpired, subprocess.SubprocessError):
+        pass
 
 
 def main():
@@ -89,10 +91,15 @@ def main():
 
     try:
         directory = sys.argv[1] if len(sys.argv) > 1 else None
-        if directory and not os.path.isdir(directory):
-            directory = None
-        peacock_color = get_peacock_color(directory)
-        set_tmux_pane_colors(peacock_color)
+        if not validate_directory(directory):
+            directory = os.getcwd()
+        git_info = get_git_info(directory)
+        git_root = git_info["toplevel"] if git_info else None
+        palette = get_peacock_palette(directory, git_root=git_root)
+        # Styles are window options, so a matching fingerprint on the current
+        # window means there is nothing to change
+        if get_last_applied_fingerprint() != palette_fingerprint(palette):
+            set_tmux_pane_colors(palette)
     finally:
         lock.release()
 
@@ -0,0 +1,148 @@
+/*
+ * peacock_color.c - Optional native color helpers for tmux-peacock
+ *
+ * Drop-in replacements for hsl_to_hex() and generate_color_for_name() in
+ * peacock_utils.py, which falls back to the pure-Python versions when this
+ * module is not built. Results match the Python implementation exactly for
+ * inputs in range.
+ *
+ * Build: python3 setup.py build_ext --inplace
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <math.h>
+#include <stdint.h>
+
+/* Must match GENERATED_SATURATION / GENERATED_LIGHTNESS in peacock_utils.py */
+#define GENERATED_SATURATION 70.0
+#define GENERATED_LIGHTNESS 50.0
+#define GOLDEN_RATIO_CONJUGATE 0.618033988749895
+
+static uint32_t crc32_table[256];
+
+static void init_crc32_table(void)
+{
+    for (uint32_t i = 0; i < 256; i++) {
+        uint32_t c = i;
+        for (int k = 0; k < 8; k++) {
+            c = (c & 1) ? 0xEDB88320u ^ (c >> 1) : c >> 1;
+        }
+        crc32_table[i] = c;
+    }
+}
+
+/* Same result as zlib.crc32() */
+static uint32_t crc32(const unsigned char *buf, Py_ssize_t len)
+{
+    uint32_t c = 0xFFFFFFFFu;
+    for (Py_ssize_t i = 0; i < len; i++) {
+        c = crc32_table[(c ^ buf[i]) & 0xFF] ^ (c >> 8);
+    }
+    return c ^ 0xFFFFFFFFu;
+}
+
+/* Python's float % operator: the result takes the sign of the divisor */
+static double py_fmod(double a, double b)
+{
+    double r = fmod(a, b);
+    if (r != 0.0 && ((r < 0.0) != (b < 0.0))) {
+        r += b;
+    }
+    return r;
+}
+
+static int channel(double v)
+{
+    /* int() truncation, clamped so out of range input can't overflow */
+    long c = (long)(v * 255);
+    return c < 0 ? 0 : (c > 255 ? 255 : (int)c);
+}
+
+static PyObject *format_hsl(double h, double s, double l)
+{
+    char buf[8];
+
+    h = h / 360.0;
+    s = s / 100.0;
+    l = l / 100.0;
+
+    double c = (1 - fabs(2 * l - 1)) * s;
+    double x = c * (1 - fabs(py_fmod(h * 6, 2) - 1));
+    double m = l - c / 2;
+    double r, g, b;
+
+    long sector = ((long)(h * 6)) % 6;
+    if (sector < 0) {
+        sector += 6;
+    }
+    switch (sector) {
+    case 0: r = c; g = x; b = 0; break;
+    case 1: r = x; g = c; b = 0; break;
+    case 2: r = 0; g = c; b = x; break;
+    case 3: r = 0; g = x; b = c; break;
+    case 4: r = x; g = 0; b = c; break;
+    default: r = c; g = 0; b = x; break;
+    }
+
+    snprintf(buf, sizeof(buf), "#%02x%02x%02x",
+             channel(r + m), channel(g + m), channel(b + m));
+    return PyUnicode_FromStringAndSize(buf, 7);
+}
+
+static PyObject *hsl_to_hex(PyObject *self, PyObject *args)
+{
+    double h, s, l;
+
+    if (!PyArg_ParseTuple(args, "ddd", &h, &s, &l)) {
+        return NULL;
+    }
+    return format_hsl(h, s, l);
+}
+
+static PyObject *color_for_name(PyObject *self, PyObject *name)
+{
+    const char *data;
+    Py_ssize_t len;
+
+    if (!PyUnicode_Check(name)) {
+        PyErr_SetString(PyExc_TypeError, "name must be a str");
+        return NULL;
+    }
+    data = PyUnicode_AsUTF8AndSize(name, &len);
+    if (data == NULL) {
+        return NULL;
+    }
+    if (len == 0) {
+        data = "default";
+        len = 7;
+    }
+
+    uint32_t seed = crc32((const unsigned char *)data, len);
+    double hue = py_fmod(seed * GOLDEN_RATIO_CONJUGATE, 1.0) * 360;
+    long bucket = ((long)hue) % 360;
+
+    return format_hsl((double)bucket, GENERATED_SATURATION, GENERATED_LIGHTNESS);
+}
+
+static PyMethodDef peacock_color_methods[] = {
+    {"hsl_to_hex", hsl_to_hex, METH_VARARGS,
+     "Convert HSL (0-360, 0-100, 0-100) to a hex color."},
+    {"color_for_name", color_for_name, METH_O,
+     "Generate a distinctive hex color for a name."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef peacock_color_module = {
+    PyModuleDef_HEAD_INIT,
+    "peacock_color",
+    "Native color helpers for tmux-peacock.",
+    -1,
+    peacock_color_methods,
+};
+
+PyMODINIT_FUNC PyInit_peacock_color(void)
+{
+    init_crc32_table();
+    return PyModule_Create(&peacock_color_module);
+}
@@ -6,22 +6,76 @@ This module contains common functions for color manipulation, caching,
 and git operations used by both peacock-sync.py and pane-title-colored.py.
 """
 
+import atexit
 import fcntl
-import hashlib
+import functools
 import json
 import os
-import re
+import signal
+import stat
+import string
 import subprocess
 import tempfile
 import time
+import zlib
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple, Union
 
 # Constants
 SUBPROCESS_TIMEOUT = 5  # seconds
-HEX_COLOR_RE = re.compile(r"^#?([0-9a-fA-F]{6})$")
+MIN_GIT_TIMEOUT = 0.5  # seconds, floor for the adaptive git timeout
+QUICK_GIT_CHECK_DEPTH = 20  # parent directories probed for .git before forking
 MAX_JSON_SIZE = 1024 * 1024  # 1MB
 LOCK_TIMEOUT = 10  # seconds
+COLOR_CACHE_LOCK_WAIT = 1.0  # seconds a color cache flush waits for the lock
+GIT_CACHE_MAX_ENTRIES = 256
+COLOR_CACHE_MAX_ENTRIES = 256
+COLOR_CACHE_TOUCH_INTERVAL = 24 * 60 * 60  # seconds
+TITLE_CACHE_TTL = 60  # seconds
+GIT_CACHE_TTL = 2.0  # seconds
+USE_REMOTE_NAME_ENV = "PEACOCK_USE_REMOTE_NAME"
+USE_GIT_REV_PARSE_ENV = "PEACOCK_USE_GIT_REV_PARSE"
+MAX_REL_PATH_LENGTH = 20  # characters of the in-repo path shown in titles
+REL_PATH_ELLIPSIS = "..."
+
+# Factors used to derive pane colors from a base peacock color
+BORDER_FACTOR = 0.6
+ACTIVE_BORDER_FACTOR = 0.8
+TINT_FACTOR = 0.08
+BACKGROUND_RGB = (30, 30, 30)  # Dark background the tint is blended into
+
+# Saturation and lightness of generated colors (HSL, 0-100)
+GENERATED_SATURATION = 70.0
+GENERATED_LIGHTNESS = 50.0
+
+# Resolved once per process, normalize_path() runs on every title render
+_HOME = os.path.expanduser("~").rstrip(os.sep) or os.sep
+_HOME_PREFIX = _HOME + os.sep
+_HEX_DIGITS = frozenset(string.hexdigits)
+_REL_PATH_TAIL = MAX_REL_PATH_LENGTH - len(REL_PATH_ELLIPSIS)
+
+# PID written into lock files, refreshed in forked children
+_PID_BYTES = str(os.getpid()).encode()
+
+
+def _refresh_pid_bytes():
+    global _PID_BYTES
+    _PID_BYTES = str(os.getpid()).encode()
+
+
+os.register_at_fork(after_in_child=_refresh_pid_bytes)
+
+# Moving average of git call durations in this process, None until one ran
+_git_latency_ewma: Optional[float] = None
+
+# Memo of git subprocess results: (function, realpath, *args) -> (time, result)
+_GIT_CACHE: Dict[tuple, Tuple[float, Any]] = {}
+
+# Per-process memo of the parsed color cache file: path -> (mtime_ns, cache)
+_COLOR_CACHE_MEMO: Dict[Path, Tuple[Optional[int], dict]] = {}
+
+# Color cache entries not written to disk yet: key -> entry
+_COLOR_CACHE_PENDING: Dict[str, dict] = {}
 
 
 # =============================================================================
@@ -29,6 +83,19 @@ LOCK_TIMEOUT = 10  # seconds
 # =============================================================================
 
 
+def _hex_digits(color: str) -> Optional[str]:
+    """Return the 6 hex digits of "#RRGGBB"/"RRGGBB", or None if malformed."""
+    if not isinstance(color, str):
+        return None
+    hex_str = color.strip()
+    if hex_str.startswith("#"):
+        hex_str = hex_str[1:]
+    # Checked explicitly: int(x, 16) also accepts signs and underscores
+    if len(hex_str) != 6 or not _HEX_DIGITS.issuperset(hex_str):
+        return None
+    return hex_str
+
+
 def validate_hex_color(color: str) -> Optional[str]:
     """
     Validate and normalize hex color format.
@@ -39,12 +106,10 @@ def validate_hex_color(color: str) -> Optional[str]:
     Returns:
         Normalized hex color (#RRGGBB) or None if invalid
     """
-    if not isinstance(color, str):
+    hex_str = _hex_digits(color)
+    if hex_str is None:
         return None
-    match = HEX_COLOR_RE.match(color.strip())
-    if match:
-        return f"#{match.group(1).lower()}"
-    return None
+    return "#" + hex_str.lower()
 
 
 def hex_to_rgb(hex_color: str) -> Optional[Tuple[int, int, int]]:
@@ -57,11 +122,10 @@ def hex_to_rgb(hex_color: str) -> Optional[Tuple[int, int, int]]:
     Returns:
         RGB tuple (r, g, b) or None if invalid
     """
-    normalized = validate_hex_color(hex_color)
-    if not normalized:
+    hex_str = _hex_digits(hex_color)
+    if hex_str is None:
         return None
-    hex_str = normalized.lstrip("#")
-    return tuple(int(hex_str[i : i + 2], 16) for i in (0, 2, 4))
+    return (int(hex_str[0:2], 16), int(hex_str[2:4], 16), int(hex_str[4:6], 16))
 
 
 def rgb_to_hex(rgb: Tuple[int, int, int]) -> str:
@@ -105,7 +169,7 @@ def create_background_tint(hex_color: str, factor: float = 0.05) -> Optional[str
     if not rgb:
         return None
     r, g, b = rgb
-    bg_r, bg_g, bg_b = 30, 30, 30  # Dark background RGB
+    bg_r, bg_g, bg_b = BACKGROUND_RGB
 
     r = int(bg_r + (r - bg_r) * factor)
     g = int(bg_g + (g - bg_g) * factor)
@@ -118,6 +182,9 @@ def hsl_to_hex(h: float, s: float, l: float) -> str:
     """
     Convert HSL to hex color.
 
+    Uses the chroma formulation, picking the channel order for the hue's
+    60 degree sector from a table instead of per-channel branching.
+
     Args:
         h: Hue (0-360)
         s: Saturation (0-100)
@@ -130,29 +197,19 @@ def hsl_to_hex(h: float, s: float, l: float) -> str:
     s = s / 100.0
     l = l / 100.0
 
-    def hue_to_rgb(p: float, q: float, t: float) -> float:
-        if t < 0:
-            t += 1
-        if t > 1:
-            t -= 1
-        if t < 1 / 6:
-            return p + (q - p) * 6 * t
-        if t < 1 / 2:
-            return q
-        if t < 2 / 3:
-            return p + (q - p) * (2 / 3 - t) * 6
-        return p
-
-    if s == 0:
-        r = g = b = l
-    else:
-        q = l * (1 + s) if l < 0.5 else l + s - l * s
-        p = 2 * l - q
-        r = hue_to_rgb(p, q, h + 1 / 3)
-        g = hue_to_rgb(p, q, h)
-        b = hue_to_rgb(p, q, h - 1 / 3)
+    c = (1 - abs(2 * l - 1)) * s
+    x = c * (1 - abs((h * 6) % 2 - 1))
+    m = l - c / 2
+    r, g, b = (
+        (c, x, 0),
+        (x, c, 0),
+        (0, c, x),
+        (0, x, c),
+        (x, 0, c),
+        (c, 0, x),
+    )[int(h * 6) % 6]
 
-    return rgb_to_hex((int(r * 255), int(g * 255), int(b * 255)))
+    return rgb_to_hex((int((r + m) * 255), int((g + m) * 255), int((b + m) * 255)))
 
 
 def generate_color_for_name(name: str) -> str:
@@ -167,17 +224,50 @@ def generate_color_for_name(name: str) -> str:
     """
     if not name:
         name = "default"
-    hash_val = hashlib.md5(name.encode()).hexdigest()
-    seed = int(hash_val[:8], 16)
+    seed = zlib.crc32(name.encode()) & 0xFFFFFFFF
 
     golden_ratio_conjugate = 0.618033988749895
     hue = (seed * golden_ratio_conjugate) % 1.0
     hue = hue * 360
 
-    saturation = 70
-    lightness = 50
+    return _hue_to_hex(int(hue) % 360)
+
+
+@functools.lru_cache(maxsize=360)
+def _hue_to_hex(hue: int) -> str:
+    """Hex color for a whole-degree hue at the generated saturation/lightness."""
+    return hsl_to_hex(float(hue), GENERATED_SATURATION, GENERATED_LIGHTNESS)
+
+
+# Use the native implementations when the optional C extension is built
+# (see peacock_color.c), keeping the pure-Python versions as the fallback
+try:
+    from peacock_color import color_for_name as generate_color_for_name
+    from peacock_color import hsl_to_hex
+except ImportError:
+    pass
 
-    return hsl_to_hex(hue, saturation, lightness)
+
+def derive_palette(base: str) -> Optional[dict]:
+    """
+    Compute the pane colors derived from a base color.
+
+    Args:
+        base: Base hex color
+
+    Returns:
+        Palette dict with "base", "muted", "bright" and "tint" hex colors,
+        or None if input invalid
+    """
+    validated = validate_hex_color(base)
+    if not validated:
+        return None
+    return {
+        "base": validated,
+        "muted": mute_color(validated, BORDER_FACTOR),
+        "bright": mute_color(validated, ACTIVE_BORDER_FACTOR),
+        "tint": create_background_tint(validated, TINT_FACTOR),
+    }
 
 
 # =============================================================================
@@ -190,6 +280,11 @@ def get_cache_file_path() -> Path:
     return Path.home() / ".config" / "tmux-peacock-colors.json"
 
 
+def get_git_cache_file_path() -> Path:
+    """Get the path to the git info cache file."""
+    return Path.home() / ".cache" / "tmux-peacock-git.json"
+
+
 def safe_read_json(path: Path, max_size: int = MAX_JSON_SIZE) -> Optional[dict]:
     """
     Safely read JSON file with symlink and size checks.
@@ -216,13 +311,13 @@ def safe_read_json(path: Path, max_size: int = MAX_JSON_SIZE) -> Optional[dict]:
         return None
 
 
-def safe_write_json(path: Path, data: dict) -> bool:
+def safe_write_json(path: Path, data: Union[dict, list]) -> bool:
     """
     Atomically write JSON file with symlink protection.
 
     Args:
         path: Path to write to
-        data: Dictionary to write as JSON
+        data: Dictionary or list to write as JSON
 
     Returns:
         True on success, False on error
@@ -243,7 +338,7 @@ def safe_write_json(path: Path, data: dict) -> bool:
             # Set secure permissions
             os.chmod(tmp_path, 0o600)
             # Atomic rename
-            os.rename(tmp_path, path)
+            os.replace(tmp_path, path)
             return True
         except Exception:
             # Clean up temp file on error
@@ -256,15 +351,206 @@ def safe_write_json(path: Path, data: dict) -> bool:
         return False
 
 
+def _parse_color_cache(data) -> dict:
+    # Older versions stored a {key: color} dict without usage times
+    if isinstance(data, dict):
+        return recompute_all_derived(data)
+    if not isinstance(data, list):
+        return {}
+
+    cache = {}
+    for item in data:
+        if not isinstance(item, list) or len(item) != 3:
+            continue
+        key, entry, last_used = item
+        if not isinstance(key, str):
+            continue
+        if isinstance(entry, str):
+            entry = {"base": entry}
+        if not isinstance(entry, dict):
+            continue
+        if not isinstance(last_used, (int, float)):
+            last_used = 0
+        cache[key] = {**entry, "last_used": last_used}
+    return cache
+
+
 def load_color_cache() -> dict:
-    """Load cached color assignments."""
-    cache = safe_read_json(get_cache_file_path())
-    return cache if cache is not None else {}
+    """
+    Load cached color assignments.
+
+    The parsed file is memoized by its mtime, so repeat lookups within one
+    process cost a stat instead of a JSON parse. Entries recorded with
+    set_color_cache_entry() but not flushed yet are included.
+
+    Returns:
+        Copy of the cache dict, safe for the caller to modify
+    """
+    path = get_cache_file_path()
+    mtime_ns = _mtime_ns(path)
+    memo = _COLOR_CACHE_MEMO.get(path)
+    if memo is None or memo[0] != mtime_ns:
+        memo = (mtime_ns, _parse_color_cache(safe_read_json(path)))
+        _COLOR_CACHE_MEMO[path] = memo
+    return {**memo[1], **_COLOR_CACHE_PENDING}
+
+
+def palette_from_cache_entry(entry) -> Optional[dict]:
+    """
+    Convert a color cache entry to a palette, computing missing fields.
+
+    Accepts both the current palette dict format and the older format
+    where each entry was a plain hex color string.
+
+    Args:
+        entry: Cache entry value
+
+    Returns:
+        Palette dict or None if the entry is invalid
+    """
+    if isinstance(entry, str):
+        return derive_palette(entry)
+    if not isinstance(entry, dict):
+        return None
+    base = validate_hex_color(entry.get("base"))
+    if not base:
+        return None
+    derived = {
+        key: validate_hex_color(entry.get(key)) for key in ("muted", "bright", "tint")
+    }
+    if not all(derived.values()):
+        return derive_palette(base)
+    return {"base": base, **derived}
+
+
+def recompute_all_derived(cache: dict) -> dict:
+    """
+    Recompute the derived colors of every cache entry in one pass.
+
+    Used to migrate whole caches from older formats at once instead of
+    upgrading (and rewriting the file for) one entry per lookup.
+
+    Args:
+        cache: Color cache dict, entries as palettes or plain hex strings
+
+    Returns:
+        New cache dict with complete palettes; entries with an invalid
+        base color are dropped and last_used times are preserved
+    """
+    keys, rgbs, last_used = [], [], []
+    for key, entry in cache.items():
+        base = entry.get("base") if isinstance(entry, dict) else entry
+        rgb = hex_to_rgb(base)
+        if rgb:
+            keys.append(key)
+            rgbs.append(rgb)
+            used = entry.get("last_used", 0) if isinstance(entry, dict) else 0
+            last_used.append(used)
+
+    def scale(factor):
+        return [
+            rgb_to_hex((int(r * factor), int(g * factor), int(b * factor)))
+            for r, g, b in rgbs
+        ]
+
+    bg_r, bg_g, bg_b = BACKGROUND_RGB
+    bases = [rgb_to_hex(rgb) for rgb in rgbs]
+    muted = scale(BORDER_FACTOR)
+    bright = scale(ACTIVE_BORDER_FACTOR)
+    tints = [
+        rgb_to_hex(
+            (
+                int(bg_r + (r - bg_r) * TINT_FACTOR),
+                int(bg_g + (g - bg_g) * TINT_FACTOR),
+                int(bg_b + (b - bg_b) * TINT_FACTOR),
+            )
+        )
+        for r, g, b in rgbs
+    ]
+
+    return {
+        key: {"base": b, "muted": m, "bright": br, "tint": t, "last_used": u}
+        for key, b, m, br, t, u in zip(keys, bases, muted, bright, tints, last_used)
+    }
 
 
 def save_color_cache(cache: dict) -> bool:
-    """Save color assignments to cache."""
-    return safe_write_json(get_cache_file_path(), cache)
+    """
+    Save color assignments to cache.
+
+    Entries are written as a list of [key, palette, last_used_epoch],
+    most recently used first, keeping only COLOR_CACHE_MAX_ENTRIES.
+    """
+
+    def last_used(item):
+        entry = item[1]
+        value = entry.get("last_used", 0) if isinstance(entry, dict) else 0
+        return value if isinstance(value, (int, float)) else 0
+
+    data = []
+    for key, entry in sorted(cache.items(), key=last_used, reverse=True):
+        if len(data) >= COLOR_CACHE_MAX_ENTRIES:
+            break
+        if isinstance(entry, dict):
+            palette = {k: v for k, v in entry.items() if k != "last_used"}
+            data.append([key, palette, last_used((key, entry))])
+        else:
+            data.append([key, entry, 0])
+
+    path = get_cache_file_path()
+    if not safe_write_json(path, data):
+        return False
+    # We know what the file now holds, so the next load doesn't re-parse it
+    _COLOR_CACHE_MEMO[path] = (_mtime_ns(path), _parse_color_cache(data))
+    return True
+
+
+def set_color_cache_entry(key: str, entry: dict):
+    """
+    Record a color cache entry, deferring the write to flush_color_cache().
+
+    A burst of new directories then costs one write instead of one per
+    color. Pending entries are flushed at interpreter exit.
+
+    Args:
+        key: Color key (directory name)
+        entry: Palette dict including "last_used"
+    """
+    _COLOR_CACHE_PENDING[key] = entry
+
+
+def flush_color_cache() -> bool:
+    """
+    Write pending color cache entries, merged into the current file.
+
+    The file is re-read under a lock so entries written by other processes
+    in the meantime are kept. If the lock is still taken after
+    COLOR_CACHE_LOCK_WAIT, or the lock file can't be used at all, the write
+    happens anyway, like it did before writes were deferred.
+
+    Returns:
+        True if nothing was pending or the write succeeded
+    """
+    if not _COLOR_CACHE_PENDING:
+        return True
+
+    lock = FileLock(str(get_runtime_dir() / "tmux-peacock-colors.lock"))
+    deadline = time.monotonic() + COLOR_CACHE_LOCK_WAIT
+    while (
+        not lock.acquire() and lock.contended and time.monotonic() < deadline
+    ):
+        time.sleep(0.02)
+    try:
+        # Includes the pending entries on top of what's on disk now
+        saved = save_color_cache(load_color_cache())
+    finally:
+        lock.release()
+    if saved:
+        _COLOR_CACHE_PENDING.clear()
+    return saved
+
+
+atexit.register(flush_color_cache)
 
 
 # =============================================================================
@@ -282,10 +568,16 @@ class FileLock:
     - Non-blocking with immediate return
     """
 
-    def __init__(self, lock_path: str = "/tmp/tmux-peacock-sync.lock"):
+    def __init__(self, lock_path: Optional[str] = None):
+        # Default to the private runtime dir rather than world-writable /tmp
+        if lock_path is None:
+            lock_path = str(get_runtime_dir() / "tmux-peacock-sync.lock")
         self.lock_path = lock_path
         self.lock_fd = None
         self.acquired = False
+        # Whether the last failed acquire() was because the lock is taken,
+        # as opposed to the lock file being unusable
+        self.contended = False
 
     def acquire(self) -> bool:
         """
@@ -295,32 +587,38 @@ class FileLock:
             True if lock acquired, False if already held by another process
         """
         try:
-            # Open or create lock file
-            self.lock_fd = open(self.lock_path, "w")
+            # Open or create lock file without truncating it, the PID is only
+            # rewritten once the lock is ours
+            self.lock_fd = os.open(
+                self.lock_path, os.O_WRONLY | os.O_CREAT | os.O_CLOEXEC, 0o600
+            )
 
             # Try to acquire exclusive, non-blocking lock
-            fcntl.flock(self.lock_fd.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
 
             # Write PID for debugging
-            self.lock_fd.write(str(os.getpid()))
-            self.lock_fd.flush()
+            os.ftruncate(self.lock_fd, 0)
+            os.write(self.lock_fd, _PID_BYTES)
 
             self.acquired = True
+            self.contended = False
             return True
 
-        except (IOError, OSError):
-            # Lock is held by another process
-            if self.lock_fd:
-                self.lock_fd.close()
+        except (IOError, OSError) as e:
+            # Lock is held by another process, or the file can't be opened
+            self.contended = isinstance(e, BlockingIOError)
+            if self.lock_fd is not None:
+                os.close(self.lock_fd)
                 self.lock_fd = None
             return False
 
     def release(self):
         """Release the lock."""
-        if self.lock_fd:
+        if self.lock_fd is not None:
+            # Closing the only descriptor releases the flock, the fd is
+            # O_CLOEXEC so exec'd children don't keep a copy
             try:
-                fcntl.flock(self.lock_fd.fileno(), fcntl.LOCK_UN)
-                self.lock_fd.close()
+                os.close(self.lock_fd)
             except (IOError, OSError):
                 pass
             self.lock_fd = None
@@ -341,28 +639,184 @@ class FileLock:
 # =============================================================================
 
 
-def get_git_toplevel(directory: str) -> Optional[str]:
+def _git_timeout() -> float:
+    """
+    Timeout for the next git call.
+
+    10x the average duration of earlier calls, clamped between
+    MIN_GIT_TIMEOUT and SUBPROCESS_TIMEOUT, so a hung git on a broken
+    network mount fails fast once normal latency is known.
+    """
+    if _git_latency_ewma is None:
+        return SUBPROCESS_TIMEOUT
+    return max(MIN_GIT_TIMEOUT, min(SUBPROCESS_TIMEOUT, 10 * _git_latency_ewma))
+
+
+def _record_git_latency(elapsed: float):
+    global _git_latency_ewma
+    if _git_latency_ewma is None:
+        _git_latency_ewma = elapsed
+    else:
+        _git_latency_ewma = 0.8 * _git_latency_ewma + 0.2 * elapsed
+
+
+def _run_git(args: list, cwd: str) -> subprocess.CompletedProcess:
+    """
+    Run git with the adaptive timeout, capturing stdout and stderr.
+
+    git runs in its own session so a timeout kills everything it started,
+    not just the git process itself.
+
+    Args:
+        args: Arguments after "git"
+        cwd: Directory to run in
+
+    Returns:
+        The completed process
+
+    Raises:
+        subprocess.TimeoutExpired: If git didn't finish in time
+        OSError: If git couldn't be started
+    """
+    timeout = _git_timeout()
+    start = time.monotonic()
+    proc = subprocess.Popen(
+        ["git", *args],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        proc.communicate()
+        # Count the full timeout so the next call gets more time
+        _record_git_latency(timeout)
+        raise
+    _record_git_latency(time.monotonic() - start)
+    return subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+
+
+def _memoize_git(ttl: float = GIT_CACHE_TTL):
+    """
+    Memoize a git helper per real directory path for ttl seconds.
+
+    A burst of lookups for the same directory (one hook invocation, or
+    several panes refreshing at once in the daemon) shares one subprocess,
+    while results still expire quickly enough to pick up branch switches.
+    At most GIT_CACHE_MAX_ENTRIES results are kept, least recently used
+    ones are dropped first.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(directory: str, *args):
+            key = (func.__name__, os.path.realpath(directory)) + args
+            now = time.monotonic()
+            cached = _GIT_CACHE.pop(key, None)
+            if cached and now - cached[0] < ttl:
+                _GIT_CACHE[key] = cached
+                return cached[1]
+            result = func(directory, *args)
+            # Hits and refreshes move entries to the end, so the first ones
+            # are the least recently used
+            _GIT_CACHE[key] = (now, result)
+            while len(_GIT_CACHE) > GIT_CACHE_MAX_ENTRIES:
+                del _GIT_CACHE[next(iter(_GIT_CACHE))]
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_git_cache(directory: Optional[str] = None):
+    """
+    Drop memoized git results.
+
+    Args:
+        directory: Only drop results for this directory (defaults to all)
+    """
+    if directory is None:
+        _GIT_CACHE.clear()
+        return
+    real_directory = os.path.realpath(directory)
+    for key in [key for key in _GIT_CACHE if key[1] == real_directory]:
+        del _GIT_CACHE[key]
+
+
+def _git_ceilings() -> frozenset:
+    """Directories from GIT_CEILING_DIRECTORIES that discovery stops at."""
+    value = os.environ.get("GIT_CEILING_DIRECTORIES")
+    if not value:
+        return frozenset()
+    return frozenset(
+        os.path.realpath(path) for path in value.split(os.pathsep) if path
+    )
+
+
+def _quick_git_check(directory: str) -> bool:
+    """
+    Check whether a directory could be inside a git repository.
+
+    Runs the same walk as _find_git_root(), limited to the directory and
+    QUICK_GIT_CHECK_DEPTH - 1 parents. Only a negative answer is
+    definitive; paths deeper than the limit are assumed to be worth asking
+    git about.
+
+    Args:
+        directory: Directory to check
+
+    Returns:
+        False if no repository can contain directory, True otherwise
     """
-    Get git repository toplevel using git rev-parse.
+    root, complete = _walk_to_git_root(directory, QUICK_GIT_CHECK_DEPTH)
+    return root is not None or not complete
+
+
+@_memoize_git()
+def _git_rev_parse_bundle(directory: str) -> Optional[dict]:
+    """
+    Query toplevel and branch with a single git rev-parse invocation.
+
+    Results are memoized per directory (see _memoize_git), so
+    get_git_toplevel() and get_git_branch() share one git fork.
 
     Args:
         directory: Directory to check
 
     Returns:
-        Git root path or None if not in a git repo
+        Dict with "toplevel" and "branch" keys or None if not in a git repo
     """
-    if not directory or not os.path.isdir(directory):
+    # Don't fork git just to hear there's no repo, unless GIT_DIR points
+    # somewhere a walk can't see
+    if "GIT_DIR" not in os.environ and not _quick_git_check(directory):
         return None
+
+    info = None
     try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--show-toplevel"],
-            cwd=directory,
-            capture_output=True,
-            text=True,
-            timeout=SUBPROCESS_TIMEOUT,
+        # Prints toplevel, HEAD's SHA and the abbreviated ref on separate lines
+        result = _run_git(
+            ["rev-parse", "--show-toplevel", "HEAD", "--abbrev-ref", "HEAD"],
+            directory,
         )
-        if result.returncode == 0:
-            return result.stdout.strip()
+        # Paths are decoded like the OS does, skipping the text-mode wrapper
+        lines = os.fsdecode(result.stdout).splitlines()
+        if lines and lines[0]:
+            branch = None
+            # A repo without commits has no HEAD yet, but still reports its toplevel
+            if result.returncode == 0 and len(lines) >= 3:
+                branch = lines[2].strip()
+                if branch == "HEAD":
+                    # Detached HEAD, use short SHA
+                    branch = lines[1].strip()[:7]
+            if result.returncode == 0 or os.path.isabs(lines[0]):
+                info = {"toplevel": lines[0].strip(), "branch": branch or None}
     except (
         subprocess.TimeoutExpired,
         subprocess.SubprocessError,
@@ -370,7 +824,115 @@ def get_git_toplevel(directory: str) -> Optional[str]:
         OSError,
     ):
         pass
-    return None
+
+    return info
+
+
+def get_git_toplevel(directory: str) -> Optional[str]:
+    """
+    Get git repository toplevel.
+
+    Found by walking up to the nearest .git entry. git rev-parse is used
+    instead when PEACOCK_USE_GIT_REV_PARSE=1 or GIT_DIR/GIT_WORK_TREE are
+    set, since those can point the repository somewhere else entirely.
+
+    Args:
+        directory: Directory to check
+
+    Returns:
+        Git root path or None if not in a git repo
+    """
+    if not validate_directory(directory):
+        return None
+    if not _use_git_rev_parse():
+        return _find_git_root(directory)
+    info = _git_rev_parse_bundle(directory)
+    return info["toplevel"] if info else None
+
+
+def _use_git_rev_parse() -> bool:
+    """Whether repository discovery has to be left to git itself."""
+    return (
+        os.environ.get(USE_GIT_REV_PARSE_ENV) == "1"
+        or "GIT_DIR" in os.environ
+        or "GIT_WORK_TREE" in os.environ
+    )
+
+
+@_memoize_git()
+def _find_git_root(directory: str) -> Optional[str]:
+    """
+    Find the nearest parent directory containing a git repository.
+
+    Symlinks are resolved first so the result matches what
+    git rev-parse --show-toplevel reports. Like git, the walk doesn't go
+    up into GIT_CEILING_DIRECTORIES, and directories inside .git are not
+    part of a work tree.
+
+    Args:
+        directory: Directory to start from
+
+    Returns:
+        Git root path or None if not in a git repo
+    """
+    return _walk_to_git_root(directory)[0]
+
+
+def _walk_to_git_root(
+    directory: str, max_depth: Optional[int] = None
+) -> Tuple[Optional[str], bool]:
+    """
+    Walk up from a directory to the nearest git repository root.
+
+    Args:
+        directory: Directory to start from
+        max_depth: Number of directories to check at most (unlimited if None)
+
+    Returns:
+        Tuple of (git root or None, whether the walk reached a definitive
+        answer rather than stopping at max_depth)
+    """
+    ceilings = _git_ceilings()
+    current = os.path.realpath(directory)
+    if ".git" in current.split(os.sep):
+        return None, True
+    depth = 0
+    while max_depth is None or depth < max_depth:
+        found = _check_git_entry(os.path.join(current, ".git"))
+        if found is not None:
+            return (current if found else None), True
+        parent = os.path.dirname(current)
+        if parent == current or parent in ceilings:
+            return None, True
+        current = parent
+        depth += 1
+    return None, False
+
+
+def _check_git_entry(git_path: str) -> Optional[bool]:
+    """
+    Check a .git path the way git's repository discovery does.
+
+    Args:
+        git_path: Path of a directory's .git entry
+
+    Returns:
+        True for a directory containing HEAD or a file with a "gitdir:"
+        pointer (worktrees, submodules), False for any other .git file,
+        which git refuses instead of looking further up, and None if the
+        search should continue in the parent directory
+    """
+    try:
+        st = os.stat(git_path)
+    except OSError:
+        return None
+    if stat.S_ISDIR(st.st_mode):
+        return True if os.path.isfile(os.path.join(git_path, "HEAD")) else None
+    try:
+        with open(git_path, "r") as f:
+            return f.read(len("gitdir:")) == "gitdir:"
+    except (IOError, OSError, UnicodeDecodeError):
+        return False
 
 
 def get_git_branch(directory: str) -> Optional[str]:
@@ -383,43 +945,164 @@ def get_git_branch(directory: str) -> Optional[str]:
     Returns:
         Branch name, short SHA (if detached), or None
     """
-    if not directory or not os.path.isdir(directory):
+    if not validate_directory(directory):
         return None
-    try:
-        result = subprocess.run(
-            ["git", "rev-parse", "--abbrev-ref", "HEAD"],
-            cwd=directory,
-            capture_output=True,
-            text=True,
-            timeout=SUBPROCESS_TIMEOUT,
-        )
-        if result.returncode == 0:
-            branch = result.stdout.strip()
-            if branch == "HEAD":
-                # Detached HEAD, get short SHA
-                result = subprocess.run(
-                    ["git", "rev-parse", "--short", "HEAD"],
-                    cwd=directory,
-                    capture_output=True,
-                    text=True,
-                    timeout=SUBPROCESS_TIMEOUT,
-                )
-                if result.returncode == 0:
-                    return result.stdout.strip()
+    # Read HEAD directly, only fork git for layouts we don't recognize
+    if not _use_git_rev_parse():
+        if not _find_git_root(directory):
+            return None
+        head = find_git_head(directory)
+        branch = read_head_branch(head) if head else None
+        if branch:
             return branch
-    except (
-        subprocess.TimeoutExpired,
-        subprocess.SubprocessError,
-        FileNotFoundError,
-        OSError,
-    ):
-        pass
+    info = _git_rev_parse_bundle(directory)
+    return info["branch"] if info else None
+
+
+def read_head_branch(head_path: str) -> Optional[str]:
+    """
+    Get the branch name or short SHA from a HEAD file.
+
+    Args:
+        head_path: Path to the repository's HEAD file
+
+    Returns:
+        Branch name, short SHA (if detached), or None if the file is
+        unreadable or in an unrecognized format
+    """
+    try:
+        with open(head_path, "r") as f:
+            content = f.read(1024).strip()
+    except (IOError, OSError, UnicodeDecodeError):
+        return None
+    if content.startswith("ref: refs/heads/"):
+        branch = content[len("ref: refs/heads/") :]
+        # Placeholder HEAD of reftable repositories, the real one is elsewhere
+        return branch if branch and branch != ".invalid" else None
+    # Detached HEAD holds a SHA-1 or SHA-256 object id
+    if len(content) in (40, 64) and _HEX_DIGITS.issuperset(content):
+        return content[:7]
     return None
 
 
+def find_git_head(directory: str) -> Optional[str]:
+    """
+    Locate the HEAD file for the repository containing a directory.
+
+    HEAD is looked up under the toplevel found by get_git_toplevel(), so
+    it always belongs to the same repository. For worktrees and
+    submodules, where .git is a file, the "gitdir:" pointer is followed.
+    When discovery is left to git rev-parse (see _use_git_rev_parse())
+    the repository can live anywhere, and reftable repositories keep HEAD
+    in their ref tables, so no HEAD is reported for either.
+
+    Args:
+        directory: Directory to start from
+
+    Returns:
+        Path to the HEAD file or None if not found
+    """
+    if _use_git_rev_parse():
+        return None
+    toplevel = _find_git_root(directory)
+    if not toplevel:
+        return None
+
+    gitdir = os.path.join(toplevel, ".git")
+    if not os.path.isdir(gitdir):
+        try:
+            with open(gitdir, "r") as f:
+                content = f.read(4096).strip()
+        except (IOError, OSError):
+            return None
+        if not content.startswith("gitdir:"):
+            return None
+        gitdir = os.path.join(toplevel, content[len("gitdir:") :].strip())
+
+    if os.path.isdir(os.path.join(gitdir, "reftable")):
+        return None
+    head = os.path.join(gitdir, "HEAD")
+    return head if os.path.isfile(head) else None
+
+
+def _head_stamp(head: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Get (mtime_ns, inode, size) of a HEAD file, or None if it can't be stat'ed.
+
+    git replaces HEAD by renaming a new file over it, so the inode changes
+    even when two updates land in the same timestamp tick.
+    """
+    try:
+        st = os.stat(head)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+def get_git_info(directory: str) -> Optional[dict]:
+    """
+    Get git toplevel and branch for a directory, cached on disk.
+
+    Results are keyed by the directory's real path and invalidated when
+    the repository's HEAD file is replaced or modified (branch switch,
+    detached commit), so repeated pane title renders skip the git
+    subprocess.
+
+    Args:
+        directory: Directory to check
+
+    Returns:
+        Dict with "toplevel" and "branch" keys or None if not in a git repo
+    """
+    if not validate_directory(directory):
+        return None
+
+    head = find_git_head(directory)
+    if not head:
+        # Without git rev-parse discovery the walk is the final answer, git
+        # only needs asking about repositories with unusable HEAD files
+        if not _use_git_rev_parse() and not _find_git_root(directory):
+            return None
+        return _git_rev_parse_bundle(directory)
+
+    head_stamp = _head_stamp(head)
+    if head_stamp is None:
+        return _git_rev_parse_bundle(directory)
+
+    key = os.path.realpath(directory)
+    cache_path = get_git_cache_file_path()
+    cache = safe_read_json(cache_path)
+    if not isinstance(cache, dict):
+        cache = {}
+
+    entry = cache.get(key)
+    if isinstance(entry, dict) and entry.get("head_stamp") == list(head_stamp):
+        return {"toplevel": entry.get("toplevel"), "branch": entry.get("branch")}
+
+    # HEAD changed since the entry was written, don't trust the memo either
+    invalidate_git_cache(directory)
+    info = None
+    toplevel = get_git_toplevel(directory)
+    if toplevel:
+        branch = read_head_branch(head) or get_git_branch(directory)
+        info = {"toplevel": toplevel, "branch": branch}
+    if info:
+        cache.pop(key, None)
+        cache[key] = {"head_stamp": list(head_stamp), **info}
+        # Drop the oldest entries to keep the cache file small
+        while len(cache) > GIT_CACHE_MAX_ENTRIES:
+            del cache[next(iter(cache))]
+        safe_write_json(cache_path, cache)
+    return info
+
+
+@_memoize_git()
 def get_repo_name(directory: str, git_root: str) -> str:
     """
-    Get repository name from remote URL or directory name.
+    Get repository name from the directory name.
+
+    When PEACOCK_USE_REMOTE_NAME=1 is set, the name is taken from the
+    origin remote URL in .git/config instead.
 
     Args:
         directory: Current directory
@@ -428,25 +1111,82 @@ def get_repo_name(directory: str, git_root: str) -> str:
     Returns:
         Repository name
     """
-    git_root_path = Path(git_root)
+    dir_name = os.path.basename(git_root.rstrip(os.sep))
+
+    if os.environ.get(USE_REMOTE_NAME_ENV) != "1":
+        return dir_name
 
     try:
-        # Check if it's a worktree (has .git file instead of directory)
-        git_path = git_root_path / ".git"
-        if git_path.exists() and git_path.is_file():
-            return git_root_path.name
-
-        # Try to get name from remote URL
-        result = subprocess.run(
-            ["git", "remote", "get-url", "origin"],
-            cwd=directory,
-            capture_output=True,
-            text=True,
-            timeout=SUBPROCESS_TIMEOUT,
-        )
+        # Worktrees (a .git file instead of a directory) keep their own name
+        if stat.S_ISREG(os.stat(os.path.join(git_root, ".git")).st_mode):
+            return dir_name
+
+        # Try to get name from remote URL, reading .git/config directly and
+        # only asking git if the file can't be read
+        try:
+            url = read_origin_url(os.path.join(git_root, ".git", "config"))
+        except (IOError, OSError, UnicodeDecodeError):
+            url = _git_config_origin_url(git_root)
+        if url:
+            url = url.rstrip("/")
+            if url.endswith(".git"):
+                url = url[:-4]
+            # Last path component, also for scp-like "host:repo" URLs
+            name = url.rpartition("/")[2].rpartition(":")[2]
+            if name:
+                return name
+    except OSError:
+        pass
+
+    return dir_name
+
+
+def read_origin_url(config_path: str) -> Optional[str]:
+    """
+    Get the origin remote URL from a git config file.
+
+    Only the repository's own config is scanned; include directives and
+    url.<base>.insteadOf rewrites are not applied.
+
+    Args:
+        config_path: Path to .git/config
+
+    Returns:
+        The [remote "origin"] url value or None if not set
+
+    Raises:
+        OSError: If the config file can't be read
+    """
+    in_origin = False
+    with open(config_path, "r") as f:
+        for raw_line in f:
+            line = raw_line.strip()
+            if not line or line[0] in "#;":
+                continue
+            if line.startswith("["):
+                # Section names are case-insensitive, subsection names aren't
+                header = line[1 : line.find("]")] if "]" in line else line[1:]
+                name, _, subsection = header.partition(" ")
+                in_origin = (
+                    name.lower() == "remote" and subsection.strip() == '"origin"'
+                )
+                continue
+            if in_origin:
+                key, sep, value = line.partition("=")
+                if sep and key.strip().lower() == "url":
+                    value = value.strip()
+                    if len(value) >= 2 and value[0] == value[-1] == '"':
+                        value = value[1:-1]
+                    return value or None
+    return None
+
+
+def _git_config_origin_url(git_root: str) -> Optional[str]:
+    """Get the origin remote URL by asking git."""
+    try:
+        result = _run_git(["config", "--get", "remote.origin.url"], git_root)
         if result.returncode == 0:
-            url = result.stdout.strip()
-            return url.rstrip("/").rstrip(".git").split("/")[-1]
+            return os.fsdecode(result.stdout).strip() or None
     except (
         subprocess.TimeoutExpired,
         subprocess.SubprocessError,
@@ -454,8 +1194,7 @@ def get_repo_name(directory: str, git_root: str) -> str:
         OSError,
     ):
         pass
-
-    return git_root_path.name
+    return None
 
 
 def get_worktree_info(
@@ -474,22 +1213,17 @@ def get_worktree_info(
     if not git_root:
         return None, None
 
-    git_root_path = Path(git_root)
-    current_path = Path(directory)
-
     repo_name = get_repo_name(directory, git_root)
 
-    try:
-        rel_path = current_path.relative_to(git_root_path)
-        if str(rel_path) == ".":
-            return repo_name, None
-        else:
-            rel_str = str(rel_path)
-            if len(rel_str) > 20:
-                rel_str = "..." + rel_str[-17:]
-            return repo_name, rel_str
-    except ValueError:
+    rel_str = os.path.relpath(directory, git_root)
+    # Directory is not inside git_root
+    if rel_str == os.pardir or rel_str.startswith(os.pardir + os.sep):
         return repo_name, None
+    if rel_str == os.curdir:
+        return repo_name, None
+    if len(rel_str) > MAX_REL_PATH_LENGTH:
+        rel_str = REL_PATH_ELLIPSIS + rel_str[-_REL_PATH_TAIL:]
+    return repo_name, rel_str
 
 
 # =============================================================================
@@ -497,51 +1231,164 @@ def get_worktree_info(
 # =============================================================================
 
 
-def get_peacock_color(directory: Optional[str] = None) -> str:
+def read_vscode_peacock_color(settings_path: Union[str, Path]) -> Optional[str]:
     """
-    Get peacock color from VSCode settings, generating one if needed.
+    Read the peacock.color setting from a VSCode settings file.
+
+    The result is memoized per path and reused while the file's mtime and
+    size are unchanged, so repeat lookups cost a stat instead of a JSON
+    parse. Panes anywhere in one repository share the entry for its git
+    root's settings file.
+
+    Args:
+        settings_path: Path to .vscode/settings.json
+
+    Returns:
+        Normalized hex color or None if unset, invalid or unreadable
+    """
+    stat_key = _stat_key(settings_path)
+    if stat_key is None:
+        return None
+    return _parse_settings_color(str(settings_path), stat_key)
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_settings_color(
+    settings_path: str, stat_key: Tuple[int, int]
+) -> Optional[str]:
+    """Parse peacock.color, stat_key only invalidates the memo."""
+    settings = safe_read_json(Path(settings_path))
+    if not isinstance(settings, dict):
+        return None
+    existing_color = settings.get("peacock.color")
+    return validate_hex_color(existing_color) if existing_color else None
+
+
+def _stat_key(path: Union[str, Path]) -> Optional[Tuple[int, int]]:
+    """
+    Get a file's (mtime_ns, size), or None if it can't be stat'ed.
+
+    The size catches rewrites that land within the filesystem's timestamp
+    granularity. Symlinks are not followed, safe_read_json rejects them.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    """Get a file's mtime in nanoseconds, or None if it can't be stat'ed."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_peacock_palette(
+    directory: Optional[str] = None, git_root: Optional[str] = None
+) -> dict:
+    """
+    Get peacock color and its derived pane colors for a directory.
+
+    The base color comes from VSCode settings, generating one if needed.
+    Derived colors for generated base colors are stored in the color cache
+    so repeat lookups skip the color math. Resolved palettes are memoized
+    per git root until settings.json or the color cache file change; use
+    get_peacock_palette.cache_clear() to drop them.
 
     Args:
         directory: Directory to check (defaults to cwd)
+        git_root: Git root of directory if already known, skips the lookup
 
     Returns:
-        Hex color string
+        Palette dict with "base", "muted", "bright" and "tint" hex colors
     """
     if directory is None:
         directory = os.getcwd()
 
     # Resolve to git root if in a repo
     target_directory = directory
-    git_root = get_git_toplevel(directory)
+    if git_root is None:
+        git_root = get_git_toplevel(directory)
     if git_root:
         target_directory = git_root
 
-    # Try to read from VSCode settings
-    vscode_settings = Path(target_directory) / ".vscode" / "settings.json"
-    settings = safe_read_json(vscode_settings)
+    vscode_settings = os.path.join(target_directory, ".vscode", "settings.json")
+    palette = _resolve_peacock_palette(
+        target_directory,
+        _stat_key(vscode_settings),
+        _mtime_ns(get_cache_file_path()),
+    )
+    # Copy so callers can't modify the memoized palette
+    return dict(palette)
+
+
+@functools.lru_cache(maxsize=128)
+def _resolve_peacock_palette(
+    target_directory: str,
+    settings_stat: Optional[Tuple[int, int]],
+    cache_mtime_ns: Optional[int],
+) -> dict:
+    """
+    Resolve the palette for a git root or directory.
 
-    if settings:
-        existing_color = settings.get("peacock.color")
-        validated = validate_hex_color(existing_color) if existing_color else None
-        if validated:
-            return validated
+    The file stats are only part of the memo key, so an edit to either
+    file resolves the palette again.
+    """
+    # Try to read from VSCode settings
+    vscode_settings = os.path.join(target_directory, ".vscode", "settings.json")
+    validated = read_vscode_peacock_color(vscode_settings)
+    if validated:
+        return derive_palette(validated)
 
     # Generate color from directory name
-    color_key = Path(target_directory).name or "root"
+    color_key = os.path.basename(target_directory.rstrip(os.sep)) or "root"
 
     # Check cache
     cache = load_color_cache()
+    now = int(time.time())
     if color_key in cache:
-        cached = validate_hex_color(cache[color_key])
+        entry = cache[color_key]
+        cached = palette_from_cache_entry(entry)
         if cached:
+            # Upgrade entries from older formats and refresh the usage time,
+            # at most once per COLOR_CACHE_TOUCH_INTERVAL to avoid a write
+            # on every lookup
+            if (
+                not isinstance(entry, dict)
+                or any(entry.get(key) != value for key, value in cached.items())
+                or now - entry.get("last_used", 0) > COLOR_CACHE_TOUCH_INTERVAL
+            ):
+                set_color_cache_entry(color_key, {**cached, "last_used": now})
             return cached
 
     # Generate new color
-    generated_color = generate_color_for_name(color_key)
-    cache[color_key] = generated_color
-    save_color_cache(cache)
+    palette = derive_palette(generate_color_for_name(color_key))
+    set_color_cache_entry(color_key, {**palette, "last_used": now})
 
-    return generated_color
+    return palette
+
+
+def get_peacock_color(
+    directory: Optional[str] = None, git_root: Optional[str] = None
+) -> str:
+    """
+    Get peacock color from VSCode settings, generating one if needed.
+
+    Args:
+        directory: Directory to check (defaults to cwd)
+        git_root: Git root of directory if already known, skips the lookup
+
+    Returns:
+        Hex color string
+    """
+    return get_peacock_palette(directory, git_root=git_root)["base"]
+
+
+get_peacock_palette.cache_clear = _resolve_peacock_palette.cache_clear
+get_peacock_color.cache_clear = _resolve_peacock_palette.cache_clear
 
 
 # =============================================================================
@@ -549,9 +1396,221 @@ def get_peacock_color(directory: Optional[str] = None) -> str:
 # =============================================================================
 
 
+@functools.lru_cache(maxsize=64)
+def validate_directory(directory: Optional[str]) -> Optional[str]:
+    """
+    Check that a path is an existing directory.
+
+    Memoized so the git helpers and scripts don't stat the same directory
+    repeatedly within one invocation; long-lived callers (the daemon)
+    clear it with validate_directory.cache_clear() per request.
+
+    Args:
+        directory: Path to check
+
+    Returns:
+        The directory or None if it doesn't exist or isn't a directory
+    """
+    if directory and os.path.isdir(directory):
+        return directory
+    return None
+
+
 def normalize_path(directory: str) -> str:
     """Normalize path by replacing home directory with ~."""
-    home = str(Path.home())
-    if directory.startswith(home):
-        return directory.replace(home, "~", 1)
+    # Match whole path components so /home/user2 isn't shortened to ~2
+    if directory == _HOME or directory.startswith(_HOME_PREFIX):
+        return "~" + directory[len(_HOME) :]
     return directory
+
+
+def get_runtime_dir() -> Path:
+    """
+    Get a private directory for runtime files (sockets, locks).
+
+    Uses $XDG_RUNTIME_DIR when available, otherwise a per-user directory
+    in /tmp created with 0700 permissions.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return Path(runtime_dir)
+    fallback = Path(f"/tmp/tmux-peacock-{os.getuid()}")
+    if ensure_private_dir(fallback):
+        return fallback
+    # Someone else owns the /tmp path, keep runtime files in our home
+    private = Path.home() / ".cache" / "tmux-peacock"
+    try:
+        private.mkdir(mode=0o700, parents=True, exist_ok=True)
+    except OSError:
+        pass
+    return private
+
+
+def ensure_private_dir(path: Path) -> bool:
+    """
+    Create a 0700 directory if missing and check it is private to us.
+
+    Args:
+        path: Directory to create or check
+
+    Returns:
+        True if path is a directory (not a symlink) owned by this user
+    """
+    try:
+        path.mkdir(mode=0o700, exist_ok=True)
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid()
+
+
+def get_daemon_socket_path() -> Path:
+    """Get the path to the peacock daemon's unix socket."""
+    return get_runtime_dir() / "tmux-peacock.sock"
+
+
+# =============================================================================
+# Pane Titles
+# =============================================================================
+
+
+def build_pane_title(directory: str, git_info: Optional[dict]) -> str:
+    """
+    Build the pane title for a directory.
+
+    Args:
+        directory: Pane's current directory
+        git_info: Result of get_git_info() for directory
+
+    Returns:
+        "repo@branch:subdir" inside git repos, otherwise the directory name
+    """
+    if git_info:
+        git_root = git_info["toplevel"]
+        worktree_name, subdir = get_worktree_info(directory, git_root)
+        branch = git_info["branch"]
+
+        title = worktree_name or os.path.basename(git_root.rstrip("/"))
+        if branch:
+            title += f"@{branch}"
+        if subdir:
+            title += f":{subdir}"
+        return title
+
+    normalized_path = normalize_path(directory)
+    if normalized_path == "~":
+        return "~"
+    return os.path.basename(normalized_path.rstrip("/")) or normalized_path
+
+
+class TitleCache:
+    """
+    Per-pane cache of the last rendered pane title.
+
+    tmux re-renders pane titles on every status refresh, even when the
+    pane's directory has not changed. The cached title is reused while the
+    directory and the repository's HEAD file are unchanged, skipping all
+    git subprocesses. Entries older than TITLE_CACHE_TTL are ignored as a
+    safety valve for changes HEAD does not reflect. Titles in repositories
+    without a usable HEAD file are not cached.
+
+    File format: "<HEAD mtime.inode.size>\\t<directory>\\t<title>"
+    """
+
+    def __init__(self, pane_id: Optional[str], variant: str):
+        self.path = None
+        self.stamp = None
+        # tmux pane ids look like "%12". Without a HEAD to watch (git
+        # rev-parse discovery) there'd be nothing to invalidate entries on
+        if (
+            pane_id
+            and pane_id.startswith("%")
+            and pane_id[1:].isdigit()
+            and not _use_git_rev_parse()
+        ):
+            cache_dir = Path(f"/tmp/tmux-peacock-title-{os.getuid()}")
+            self.path = cache_dir / f"{pane_id[1:]}.{variant}"
+
+    def _prefix(self, directory: str) -> Optional[str]:
+        """Entry prefix for directory, None if its title can't be cached."""
+        if self.stamp is None:
+            head = find_git_head(directory)
+            head_stamp = _head_stamp(head) if head else None
+            if head_stamp:
+                self.stamp = ".".join(map(str, head_stamp))
+            elif _find_git_root(directory):
+                # A repository without a usable HEAD file (e.g. reftable),
+                # nothing would tell us about branch switches
+                self.stamp = ""
+            else:
+                self.stamp = "-"
+        if not self.stamp:
+            return None
+        return f"{self.stamp}\t{directory}\t"
+
+    def _secure_dir(self) -> bool:
+        """Ensure the cache directory exists and is a private, non-symlink dir."""
+        return ensure_private_dir(self.path.parent)
+
+    def get(self, directory: str) -> Optional[str]:
+        """
+        Get the cached title for a directory.
+
+        Args:
+            directory: Directory the title is rendered for
+
+        Returns:
+            Cached title or None on miss
+        """
+        if not self.path or not self._secure_dir():
+            return None
+        try:
+            # Reject symlinks
+            fd = os.open(self.path, os.O_RDONLY | os.O_NOFOLLOW)
+        except OSError:
+            return None
+        try:
+            with os.fdopen(fd, "r") as f:
+                if time.time() - os.fstat(fd).st_mtime > TITLE_CACHE_TTL:
+                    return None
+                content = f.read(4096)
+        except (IOError, OSError, UnicodeDecodeError):
+            return None
+
+        prefix = self._prefix(directory)
+        if prefix and content.startswith(prefix):
+            return content[len(prefix) :]
+        return None
+
+    def set(self, directory: str, title: str) -> bool:
+        """
+        Atomically store the title rendered for a directory.
+
+        Args:
+            directory: Directory the title was rendered for
+            title: Rendered title
+
+        Returns:
+            True on success, False on error
+        """
+        if not self.path or not self._secure_dir():
+            return False
+        prefix = self._prefix(directory)
+        if prefix is None:
+            return False
+        content = prefix + title
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    f.write(content)
+                os.rename(tmp_path, self.path)
+                return True
+            except Exception:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                return False
+        except OSError:
+            return False
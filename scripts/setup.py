@@ -0,0 +1,12 @@
+"""
+Build the optional native color helpers in place:
+
+    python3 setup.py build_ext --inplace
+"""
+
+from setuptools import Extension, setup
+
+setup(
+    name="peacock_color",
+    ext_modules=[Extension("peacock_color", ["peacock_color.c"])],
+)